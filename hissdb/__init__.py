@@ -1,8 +1,41 @@
-from .db import Database
-from .table import Table
-from .column import Column
-from .expression import Expression
-from .statements import (
-    Insert, InsertMany, Select,
-    Update, Delete, BaseStatement
-)
+# python standard imports
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# let type checkers and IDEs see the names that are imported lazily below
+if TYPE_CHECKING:
+    from .db import Database
+    from .table import Table
+    from .column import Column
+    from .expression import Expression
+    from .statements import (
+        Insert, InsertMany, Select, Update, Delete, BaseStatement
+    )
+
+# public names, and the submodule each one is imported from on first use
+_LAZY = {
+    'Database': '.db',
+    'Table': '.table',
+    'Column': '.column',
+    'Expression': '.expression',
+    'Insert': '.statements',
+    'InsertMany': '.statements',
+    'Select': '.statements',
+    'Update': '.statements',
+    'Delete': '.statements',
+    'BaseStatement': '.statements',
+}
+
+__all__ = list(_LAZY)
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(
+            f"module '{__name__}' has no attribute '{name}'"
+        )
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted([*globals(), *_LAZY])
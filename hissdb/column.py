@@ -1,5 +1,6 @@
 # python standard imports
-from functools import cached_property
+from collections.abc import Iterator
+from operator import itemgetter
 from sqlite3 import Cursor
 
 # internal imports
@@ -27,6 +28,8 @@ class Column(Expression):
         pk: int representing whether the column is a primary key
     """
     
+    __slots__ = ('_name', '_constraints', '_table', '_info_cache')
+    
     _pragma_cols = ['cid', 'name', 'type', 'notnull', 'dflt_value', 'pk',]
     placeholders = {}
     
@@ -51,6 +54,8 @@ class Column(Expression):
         """
         self._name = name
         self._constraints = constraints
+        self._table = None
+        self._info_cache = None
         
         if table:
             table[name] = self
@@ -72,6 +77,8 @@ class Column(Expression):
         this column, and return the single resulting value (rather than
         a tuple with one item in it).
         """
+        # only one row is read, so let SQLite stop (or sort) early
+        kwargs.setdefault('limit', 1)
         val = self.select(where, **kwargs).execute().fetchone()
         return val[0] if val else None
     
@@ -81,8 +88,17 @@ class Column(Expression):
         this column, and return a list of the resulting values (rather
         than a list of one-item tuples).
         """
-        vals = self.select(where, **kwargs).execute().fetchall()
-        return [val[0] for val in vals]
+        cur = self.select(where, **kwargs).execute()
+        return list(map(itemgetter(0), cur))
+    
+    def iter(self, where: Expression = None, **kwargs) -> Iterator:
+        """
+        Like fetchall(), but return an iterator that yields each value
+        as it is read from the database, instead of loading them all
+        into a list.
+        """
+        cur = self.select(where, **kwargs).execute()
+        return map(itemgetter(0), cur)
     
     def update(self,
         new_value: Expression,
@@ -111,18 +127,20 @@ class Column(Expression):
     def __getattr__(self, attr: str):
         if attr in self._pragma_cols:
             return self._info[self._pragma_cols.index(attr)]
+        # anything else, e.g. __deepcopy__ or a typo, is really missing
+        raise AttributeError(attr)
     
     @property
-    def _necessary_tables(self):
-        return [self._table]
+    def _necessary_tables(self) -> dict:
+        return {self._table: None}
     
-    @cached_property
+    @property
     def _info(self):
-        col_names = [r[1] for r in self._table._info]
-        col_index = col_names.index(self._name)
-        return self._table._info[col_index]
+        if self._info_cache is None:
+            self._info_cache = self._table._info_by_name[self._name]
+        return self._info_cache
     
-    @cached_property
+    @property
     def _foreign_key(self):
         if self._name in self._table._foreign_keys:
             return self._table._foreign_keys[self]
@@ -1,10 +1,18 @@
 # python standard imports
 from __future__ import annotations
-from functools import cached_property
+from contextlib import contextmanager
+from functools import cached_property, lru_cache
 from pathlib import Path
-from re import sub
+from re import search, sub
+from types import GeneratorType
 import sqlite3
 
+# optional dependency that provides a faster REGEXP
+try:
+    import sqlite_regex
+except ImportError:
+    sqlite_regex = None
+
 # internal imports
 from .table import Table
 from .column import Column
@@ -20,12 +28,29 @@ class Database:
     an existing property or method, you can instead use 'db[TABLE_NAME]'
     as a fallback.
     """
+    
+    # how many prepared statements each sqlite3 connection keeps for
+    # reuse; the sqlite3 module's default is 128
+    _cached_statements = 256
+    
+    # PRAGMA statements run on each new connection unless overridden
+    _default_pragmas = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'busy_timeout': 5000,
+    }
+    
     def __init__(
         self,
         path: str,
         autoconnect: bool = True,
         autocommit: bool = True,
         verbose: bool = False,
+        pragmas: dict = None,
+        pool_size: int = 0,
     ):
         """
         Database constructor.
@@ -44,28 +69,84 @@ class Database:
                 you make changes *outside* of a context manager.
             verbose: whether to print each SQL statement to the console
                 as it is executed
+            pragmas: dict of PRAGMA names and values to set whenever a
+                connection is opened. Defaults to WAL journaling with
+                synchronous=NORMAL and a larger cache, which is much
+                faster for writes, and waiting up to 5 seconds for
+                other connections' locks instead of failing at once.
+                Pass an empty dict to keep SQLite's own defaults.
+            pool_size: how many closed connections to keep open for
+                reuse, rather than reopening the file on each connect().
+                If this is more than 0, connections also use SQLite's
+                shared cache and may be used from multiple threads.
         """
+        self._tables = {}
         self._path = Path(path)
         self._verbose = verbose
         self._autoconnect = autoconnect
         self._autocommit = autocommit
+        if pragmas is None:
+            pragmas = self._default_pragmas
+        self._pragmas = pragmas
+        self._pool_size = pool_size
+        self._pool = []
         self._connection = None
-        self._tables = {}
+        
+        # each table's CREATE TABLE statement and PRAGMA TABLE_INFO
+        # rows, read in bulk when the file is opened
+        self._schemas = {}
+        self._infos = {}
         
         if self._path.exists():
             self.connect()
-            cur = self.execute('SELECT sql FROM sqlite_schema')
-            schema_rows = cur.fetchall()
-            for schema_row in schema_rows:
-                if not schema_row[0]:
-                    continue
-                table = Table._from_schema(schema_row[0])
+            self._load_schemas()
+            for parsed_schema in self._parsed_schemas():
+                table = Table._from_parsed_schema(*parsed_schema)
                 self._tables[table._name] = table
                 table._db = self
             if not self._autoconnect:
                 self.disconnect()
     
     
+    def _parsed_schemas(self) -> list[tuple]:
+        """
+        Return the parsed schema of each table in the database file.
+        Parsing is skipped for any CREATE TABLE statement that has
+        already been parsed, e.g. when the same file is opened again.
+        """
+        return [
+            _parse_schema(schema)
+            for schema in self._schemas.values()
+            if schema
+        ]
+    
+    
+    def _load_schemas(self):
+        """
+        Read the schema and column info of every table with one query
+        each, instead of two queries per table.
+        """
+        self._schemas = dict(self.connection.execute(
+            "SELECT name, sql FROM sqlite_schema WHERE type = 'table'"
+            " AND name NOT LIKE 'sqlite_%'"
+        ).fetchall())
+        self._infos = {}
+        cur = self.connection.execute(
+            'SELECT m.name, p.* FROM sqlite_schema AS m'
+            ' JOIN pragma_table_info(m.name) AS p'
+            " WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'"
+            ' ORDER BY m.name, p.cid'
+        )
+        for name, *info in cur:
+            self._infos.setdefault(name, []).append(tuple(info))
+    
+    
+    def _forget_schema(self, name: str):
+        "Drop the bulk-loaded schema and column info for a table"
+        self._schemas.pop(name, None)
+        self._infos.pop(name, None)
+    
+    
     def __setattr__(self, attr: str, value):
         """
         If value is a Table object, do CREATE TABLE. Otherwise,
@@ -92,6 +173,7 @@ class Database:
         if type(getattr(self, attr)) is Table:
             self.execute(f'DROP TABLE {attr}')
             self._tables.pop(attr)
+            self._forget_schema(attr)
         else:
             super().__delattr__(attr)
     
@@ -100,11 +182,13 @@ class Database:
         "Remove a Table from the database"
         self.execute(f'DROP TABLE {item}')
         self._tables.pop(item)
+        self._forget_schema(item)
    
     
     def __getattr__(self, attr: str):
-        if '_tables' in self.__dict__ and attr in self._tables:
-            return self[attr]
+        tables = self.__dict__.get('_tables')
+        if tables is not None and attr in tables:
+            return tables[attr]
         else:
             raise AttributeError(
                 f'{self} does not have any property or '
@@ -133,11 +217,14 @@ class Database:
     
     def __enter__(self):
         """
-        Context manager to handle connections to the database. If
-        self._autocommit is True, then any changes are automatically
+        Context manager to handle connections to the database. The
+        body of the 'with' statement runs inside a single transaction,
+        and if self._autocommit is True, any changes are automatically
         committed at the close of the the 'with' statement.
         """
-        self.connect(reuse_existing = True)
+        connection = self.connect(reuse_existing = True)
+        if not connection.in_transaction:
+            connection.execute('BEGIN')
         return self
     
     
@@ -150,8 +237,8 @@ class Database:
     
     def create_table(self,
         name: str,
-        columns: dict[str, str] = {},
-        foreign_keys: dict[str, str] = {},
+        columns: dict[str, str] = None,
+        foreign_keys: dict[str, str] = None,
         primary_key: tuple[str] = (),
         if_not_exist: bool = False,
         **kwargs,
@@ -178,6 +265,59 @@ class Database:
         return table
     
     
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager that groups every statement in its body into one
+        transaction, so that bulk writes are committed to disk once
+        rather than once per statement. If an exception is raised, the
+        changes are rolled back instead.
+        
+        If a transaction is already open, a savepoint is used instead,
+        so that only the changes made inside this block are rolled back
+        on failure, and nothing is committed until the outer
+        transaction is.
+        """
+        connection = self.connection
+        if connection.in_transaction:
+            connection.execute('SAVEPOINT hissdb')
+            try:
+                yield self
+            except BaseException:
+                connection.execute('ROLLBACK TO hissdb')
+                connection.execute('RELEASE hissdb')
+                raise
+            connection.execute('RELEASE hissdb')
+        else:
+            connection.execute('BEGIN')
+            try:
+                yield self
+            except BaseException:
+                connection.rollback()
+                raise
+            connection.commit()
+    
+    
+    def bulk_setup(self, rows: dict) -> int:
+        """
+        Insert rows into several tables inside one transaction, and
+        return the total number of rows added. This is much faster than
+        many separate insert() calls, e.g. when filling a new database.
+        
+        Arguments:
+            rows: dict where each key is a Table (or the name of one),
+                and each value is a list or generator of dicts mapping
+                column names to values, as in Table.insert_many()
+        """
+        total = 0
+        with self.transaction():
+            for table, table_rows in rows.items():
+                if type(table) is str:
+                    table = self[table]
+                total += table.insert_many(table_rows)
+        return total
+    
+    
     def drop_table(self, name: str):
         """
         Delete the given table and its contents.
@@ -215,9 +355,30 @@ class Database:
         """
         if self._connection and reuse_existing:
             return self._connection
-        else:
-            self._connection = sqlite3.connect(self._path)
+        elif self._pool:
+            self._connection = self._pool.pop()
             return self._connection
+        
+        in_memory = str(self._path) == ':memory:'
+        if self._pool_size and not in_memory:
+            self._connection = sqlite3.connect(
+                f'{self._path.absolute().as_uri()}?cache=shared',
+                uri = True,
+                check_same_thread = False,
+                cached_statements = self._cached_statements,
+            )
+        else:
+            self._connection = sqlite3.connect(
+                self._path,
+                check_same_thread = not self._pool_size,
+                cached_statements = self._cached_statements,
+            )
+        for k, v in self._pragmas.items():
+            if k == 'journal_mode' and in_memory:
+                continue
+            self._connection.execute(f'PRAGMA {k}={v}')
+        _enable_regexp(self._connection)
+        return self._connection
     
     
     def commit(self):
@@ -237,28 +398,54 @@ class Database:
         
         If commit is 'AUTO', only commit if self._autocommit is True, but
         don't rollback either way.
+        
+        If the connection pool is not full, the connection is kept open
+        for the next connect() instead of being closed. Any uncommitted
+        changes are rolled back first. Otherwise, 'PRAGMA optimize' is
+        run before closing, so that SQLite can update the statistics
+        its query planner uses.
         """
         if commit == True or (commit == 'AUTO' and self._autocommit):
             self.commit()
         elif commit == False:
             self.rollback()
-        self.connection.close()
+        connection = self.connection
         self._connection = None
+        if len(self._pool) < self._pool_size:
+            if connection.in_transaction:
+                connection.rollback()
+            self._pool.append(connection)
+        else:
+            if str(self._path) != ':memory:':
+                _optimize(connection)
+            connection.close()
     
     
     def execute(self,
         statement: str,
-        placeholders: dict = {},
-        many: bool = False,
+        placeholders: dict = None,
+        many: bool = None,
     ):
         """
         Feed the given statement and placeholders to the execute() or
         executemany() method of this database's SQLite3 connection. If
         self._verbose is True, also print the executed statement.
+        
+        If many is None, executemany() is used whenever the placeholders
+        are a generator or a list of rows, so that SQLite can reuse a
+        single prepared statement for every row. Set many to True or
+        False to override this.
         """
         if hasattr(statement, 'placeholders'):
-            placeholders = copy(placeholders)
-            placeholders.update(statement.placeholders)
+            if placeholders:
+                placeholders = {**placeholders, **statement.placeholders}
+            else:
+                placeholders = statement.placeholders
+            statement = str(statement)
+        if placeholders is None:
+            placeholders = {}
+        if many is None:
+            many = _is_many(placeholders)
         if many:
             func = self.connection.executemany
         else:
@@ -271,3 +458,63 @@ class Database:
             print(f'{render};\n')
 
         return func(statement, placeholders)
+
+
+# Table._parse_schema, cached by the text of the CREATE TABLE statement,
+# so the cache can never disagree with the file it was read from
+_parse_schema = lru_cache(maxsize=256)(Table._parse_schema)
+
+
+def _optimize(connection: sqlite3.Connection):
+    "Run PRAGMA optimize, unless the database can't be written to"
+    try:
+        connection.execute('PRAGMA optimize')
+    except sqlite3.OperationalError:
+        pass
+
+
+def _enable_regexp(connection: sqlite3.Connection):
+    """
+    Define SQLite's REGEXP operator on the given connection, using the
+    sqlite-regex extension if it can be loaded, or Python's re module
+    otherwise.
+    """
+    # sqlite3 may be built without extension support
+    if (
+        sqlite_regex is not None
+        and hasattr(connection, 'enable_load_extension')
+    ):
+        connection.enable_load_extension(True)
+        try:
+            sqlite_regex.load(connection)
+            return
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            # don't leave SQL's load_extension() enabled on failure
+            connection.enable_load_extension(False)
+    connection.create_function('regexp', 2, _regexp, deterministic=True)
+
+
+def _regexp(pattern: str, value) -> bool:
+    "Python implementation of SQLite's REGEXP operator"
+    if value is None:
+        return None
+    if type(value) is not str:
+        value = str(value)
+    return search(pattern, value) is not None
+
+
+def _is_many(placeholders) -> bool:
+    """
+    Guess whether the given placeholders hold parameters for many rows
+    (a generator, or a list of tuples, lists, or dicts) rather than for
+    a single execution.
+    """
+    if isinstance(placeholders, GeneratorType):
+        return True
+    return (
+        type(placeholders) is list
+        and len(placeholders) > 0
+        and type(placeholders[0]) in (tuple, list, dict)
+    )
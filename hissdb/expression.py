@@ -1,7 +1,8 @@
 # python standard imports
-from functools import cached_property
 from datetime import datetime
-from copy import copy
+from itertools import count
+import re
+import sys
 
 class Expression:
     """
@@ -19,15 +20,22 @@ class Expression:
         placeholders: a dictionary of parameters that would need to be
             provided to sqlite3.execute() if this expression were a
             Statement of its own
-        necessary_tables: a list of Tables this expression references
+        necessary_tables: a dict whose keys are the Tables this
+            expression references, in the order they appear
     """    
+    __slots__ = (
+        'placeholders', '_necessary_tables', 'args', 'tokens', 'func',
+        'prefix', '_sql',
+    )
+    
     # strings that will not be converted to placeholders
     _literals = [
         '=', '==', '%', '>', '>=', '<', '<=', '!=', '!<', '!>', '~', '<>',
         '&', '||', '+', '-', '/', '*', '>>', '<<', 'LIKE', 'NOT', 'NOT LIKE',
         'NOT IN', 'SELECT', 'FROM', 'WHERE', 'IN', 'BETWEEN', 'NOT BETWEEN',
         'GLOB', 'EXISTS', 'NOT EXISTS', 'UNIQUE', 'NULL', 'NOT NULL', 'AND',
-        'OR', 'AS', '(', ')', 'DISTINCT', 'ALL', 'ASC', 'DESC',
+        'OR', 'AS', '(', ')', 'DISTINCT', 'ALL', 'ASC', 'DESC', 'REGEXP',
+        'NOT REGEXP',
     ]
     
     def __init__(self, *args, func: str = None, prefix: str = None):
@@ -52,48 +60,62 @@ class Expression:
                 aggregate functions.
         """
         self.placeholders = {}
-        self._necessary_tables = []
+        self._necessary_tables = {}
         self.args = args
         self.tokens = []
         self.func = func
         self.prefix = prefix
         
         for arg in args:
-            if issubclass(arg.__class__, __class__):
-                self.placeholders.update(arg.placeholders)
-                self._necessary_tables += arg._necessary_tables
-            elif arg.__class__.__module__ == 'hissdb.column':
-                self._necessary_tables.append(arg._table)
-            elif arg.__class__.__module__ == 'hissdb.table':
-                self._necessary_tables.append(arg)
-            
-            elif arg is None:
-                arg = 'NULL'
-            elif type(arg) not in (int, float, str):
-                raise SyntaxError(
-                    f'Couldn\'t include "{arg}" in expression; '
-                    f'no support for objects of type: {type(arg)}'
-                )
-            elif arg not in self._literals:
-                placeholder = next_placeholder()
-                self.placeholders[placeholder[1:]] = arg
-                arg = placeholder
-            
-            # add parentheses to statements
-            if arg.__class__.__module__ == 'hissdb.statements':
-                arg = f'({str(arg)})'
-            
-            self.tokens.append(arg)
+            handler = _DISPATCH.get(arg.__class__) or _find_handler(arg)
+            self.tokens.append(handler(self, arg))
         
         for i, token in enumerate (self.tokens):
+            # check the type first, since comparing an Expression with
+            # '==' would build a new (truthy) Expression
             if (
-                token is '='
+                token.__class__ is str
+                and token == '='
                 and i+1 < len(self.tokens)
-                and self.tokens[i+1] in ['NULL', 'NOT']
+                and _is_null_or_not(self.tokens[i+1])
             ):
                 self.tokens[i] = 'IS'
-            
-        self._necessary_tables = list(set(self._necessary_tables))
+        
+        # render the text once, since expressions are never modified
+        # after they are constructed
+        joiner = ', ' if func else ' '
+        output = joiner.join([str(t) for t in self.tokens])
+        output = output.replace('( ', '(').replace(' )', ')')
+        if prefix:
+            output = f'{prefix} {output}'
+        if func is not None:
+            output = f'{func}({output})'
+        self._sql = output
+    
+    
+    @classmethod
+    def _binary(cls, left, operator: str, right):
+        """
+        Faster equivalent of Expression(left, operator, right), for the
+        'left OPERATOR right' shape built by the overloaded operators.
+        """
+        self = cls.__new__(cls)
+        self.placeholders = {}
+        self._necessary_tables = {}
+        self.args = (left, operator, right)
+        self.func = None
+        self.prefix = None
+        
+        handler = _DISPATCH.get(left.__class__) or _find_handler(left)
+        left = handler(self, left)
+        handler = _DISPATCH.get(right.__class__) or _find_handler(right)
+        right = handler(self, right)
+        if operator == '=' and _is_null_or_not(right):
+            operator = 'IS'
+        
+        self.tokens = [left, operator, right]
+        self._sql = f'{left} {operator} {right}'
+        return self
     
     
     def __str__(self):
@@ -102,15 +124,7 @@ class Expression:
         statement, with strings and integers replaced with placeholders
         unless they are listed in Expression._literals
         """
-        joiner = ', ' if self.func else ' '
-        output = joiner.join([str(t) for t in self.tokens])
-        output = output.replace('( ', '(').replace(' )', ')')
-        if self.prefix:
-            output = f'{self.prefix} {output}'
-        if self.func is not None:
-            return f'{self.func}({output})'
-        else:
-            return output
+        return self._sql
 
 
     def __repr__(self):
@@ -122,7 +136,7 @@ class Expression:
             + ')'
         )
     
-    @cached_property
+    @property
     def _db(self):
         "Find the Database that this expression relates to"
         for token in [t for t in self.tokens if hasattr(t, '_db')]:
@@ -131,29 +145,27 @@ class Expression:
     
     def render(self):
         "Text of the expression with placeholders filled in"
-        text = str(self)
-        for k, v in self.placeholders.items():
-            if type(v) is str:
-                v = f"'{v}'"
-            elif type(v) is int:
-                v = str(v)
-            text = text.replace(f':{k}', v)
-        return text
+        def fill(match):
+            key = match.group(1)
+            if key not in self.placeholders:
+                return match.group(0)
+            return _sql_literal(self.placeholders[key])
+        return _PLACEHOLDER_RE.sub(fill, str(self))
     
     
     # BITWISE OPERATORS
     
     def __and__(self, other):
-        return __class__(self, 'AND', other)
+        return __class__._binary(self, 'AND', other)
     
     def __or__(self, other):
         return __class__('(', self, 'OR', other, ')')
     
     def __rshift__(self, other):
-        return __class__(self, '>>', other)
+        return __class__._binary(self, '>>', other)
     
     def __lshift__(self, other):
-        return __class__(self, '<<', other)
+        return __class__._binary(self, '<<', other)
 
     def __invert__(self):
         """
@@ -165,44 +177,27 @@ class Expression:
         joined with AND or OR, the sub-expressions are both inverted,
         and the AND is replaced with OR, or vice versa.
         """
-        args = list(copy(self.args))
-        func = copy(self.func)
+        args = list(self.args)
+        func = self.func
         if func:
             operator = func
         elif len(args) == 3 and type(args[1]) is str:
             operator = args[1]
-        elif len(args) == 7 and args[3] == 'OR':
-            operator = args[3]
-            args = [args[1], args[3], args[5]]
-        
+        elif len(args) == 5 and type(args[2]) is str and args[2] == 'OR':
+            operator = args[2]
+            args = [args[1], args[2], args[3]]
         else:
             operator = None
         
-        opposites = (
-            ('LIKE', 'NOT LIKE'),
-            ('IN', 'NOT IN'),
-            ('BETWEEN', 'NOT BETWEEN'),
-            ('IS', 'IS NOT'),
-            ('EXISTS', 'NOT EXISTS'),
-            ('<>', '='),
-            ('==', '<>'),
-            ('<', '>='),
-            ('>', '<='),
-            ('AND', 'OR'),  # also inverts sub-expressions, see below
-        )
-        for a, b in opposites:
-            if operator not in (a, b):
-                continue
-            new_op = a if operator == b else b
-            if func:
-                func = new_op
-            else:
-                args[1] = new_op
-            break
-        else:
+        new_op = _INVERSE_OPS.get(operator)
+        if new_op is None:
             raise NotImplementedError(
                 f"Unsure how to invert expression '{str(self)}'"
             )
+        if func:
+            func = new_op
+        else:
+            args[1] = new_op
         
         if operator == 'OR':
             return ~args[0] & ~args[2]
@@ -215,22 +210,22 @@ class Expression:
     # COMPARISONS
     
     def __eq__(self, other):
-        return __class__(self, '=', other)
+        return __class__._binary(self, '=', other)
     
     def __ne__(self, other):
-        return __class__(self, '<>', other)
+        return __class__._binary(self, '<>', other)
     
     def __gt__(self, other):
-        return __class__(self, '>', other)
+        return __class__._binary(self, '>', other)
         
     def __lt__(self, other):
-        return __class__(self, '<', other)
+        return __class__._binary(self, '<', other)
         
     def __ge__(self, other):
-        return __class__(self, '>=', other)
+        return __class__._binary(self, '>=', other)
         
     def __le__(self, other):
-        return __class__(self, '<=', other)
+        return __class__._binary(self, '<=', other)
     
     
     # ARITHMETIC OPERATORS
@@ -243,25 +238,25 @@ class Expression:
         selftype = type_(self)
         
         if selftype is str and othertype is str:
-            return __class__(self, '||', other)
+            return __class__._binary(self, '||', other)
         else:
-            return __class__(self, '+', other)
+            return __class__._binary(self, '+', other)
         
     def __sub__(self, other):
-        return __class__(self, '-', other)
+        return __class__._binary(self, '-', other)
     
     def __mul__(self, other):
-        return __class__(self, '*', other)
+        return __class__._binary(self, '*', other)
     
     def __div__(self, other):
-        return __class__(self, '/', other)
+        return __class__._binary(self, '/', other)
     
     def __mod__(self, other):
         "LIKE operator for strings, modulo operator otherwise"
         if type_(self) is str:
-            return __class__(self, 'LIKE', other)
+            return __class__._binary(self, 'LIKE', other)
         else:
-            return __class__(self, '%', other)
+            return __class__._binary(self, '%', other)
     
     def __abs__(self):
         "SQLite ABS() function"
@@ -323,7 +318,7 @@ class Expression:
         return __class__(self, func='EXISTS')
     
     def in_(self, vals: list):
-        if type(vals) in [list, tuple, set]:
+        if isinstance(vals, _SEQ_TYPES):
             return __class__(self, 'IN', '(', *vals, ')')
         else:
             return __class__(self, 'IN', vals)
@@ -336,6 +331,15 @@ class Expression:
     def endswith(self, other):
         return __class__(self, 'LIKE', f'%{other}')
     
+    def matches(self, pattern: str):
+        """
+        Whether this expression contains a match for the given regular
+        expression. The matching is done inside SQLite, by the
+        sqlite-regex extension if it is installed, or by Python's re
+        module otherwise.
+        """
+        return __class__(self, 'REGEXP', pattern)
+    
     def replace(self, find, repl):
         return __class__(self, find, repl, func='REPLACE')
     
@@ -383,19 +387,131 @@ class Expression:
         return __class__(self, 'DESC')
 
 
+# types treated as a sequence of values, e.g. for IN (...)
+_SEQ_TYPES = (list, tuple, set)
+
+# interned so that membership tests for the operator strings written in
+# this module (which CPython also interns) succeed on an identity check
+_LITERALS = frozenset(map(sys.intern, Expression._literals))
+
+# pairs of operators that are the logical inverse of each other
+_OPPOSITES = (
+    ('LIKE', 'NOT LIKE'),
+    ('REGEXP', 'NOT REGEXP'),
+    ('IN', 'NOT IN'),
+    ('BETWEEN', 'NOT BETWEEN'),
+    ('IS', 'IS NOT'),
+    ('EXISTS', 'NOT EXISTS'),
+    ('<>', '='),
+    ('==', '<>'),
+    ('<', '>='),
+    ('>', '<='),
+    ('AND', 'OR'),  # also inverts sub-expressions, see __invert__
+)
+_INVERSE_OPS = {}
+for a, b in _OPPOSITES:
+    # the first pair an operator appears in takes priority
+    _INVERSE_OPS.setdefault(a, b)
+    _INVERSE_OPS.setdefault(b, a)
+del a, b
+
+
+########################################################################
+# Expression.__init__ handlers, one per type of arg
+########################################################################
+
+def _param(expr: Expression, arg) -> str:
+    "Replace a value with a new placeholder"
+    placeholder = next_placeholder()
+    expr.placeholders[placeholder[1:]] = arg
+    return placeholder
+
+def _str(expr: Expression, arg: str) -> str:
+    "Keep whitelisted words as they are, and parameterize other strings"
+    if arg in _LITERALS:
+        return arg
+    return _param(expr, arg)
+
+def _null(expr: Expression, arg: None) -> str:
+    return 'NULL'
+
+def _subexpression(expr: Expression, arg: Expression) -> Expression:
+    expr.placeholders.update(arg.placeholders)
+    expr._necessary_tables.update(arg._necessary_tables)
+    return arg
+
+def _substatement(expr: Expression, arg) -> str:
+    "Include a statement as a parenthesized subquery"
+    _subexpression(expr, arg)
+    return f'({str(arg)})'
+
+def _table(expr: Expression, arg):
+    expr._necessary_tables[arg] = None
+    return arg
+
+_DISPATCH = {
+    int: _param,
+    float: _param,
+    str: _str,
+    type(None): _null,
+}
+
+def _is_null_or_not(token) -> bool:
+    """
+    Whether an '=' before the given token should be rendered as 'IS'.
+    Only string tokens are compared, since comparing an Expression
+    with '==' would build a new (truthy) Expression.
+    """
+    return token.__class__ is str and token in ('NULL', 'NOT')
+
+def _find_handler(arg):
+    """
+    Choose the handler for an arg whose type is not in _DISPATCH yet,
+    and remember it for that type. Table and statement classes are
+    imported here rather than at the top of the module, because both
+    of their modules import this one.
+    """
+    from .statements import BaseStatement
+    from .table import Table
+    
+    cls = arg.__class__
+    if issubclass(cls, BaseStatement):
+        handler = _substatement
+    elif issubclass(cls, Expression):
+        handler = _subexpression
+    elif issubclass(cls, Table):
+        handler = _table
+    else:
+        raise SyntaxError(
+            f'Couldn\'t include "{arg}" in expression; '
+            f'no support for objects of type: {type(arg)}'
+        )
+    _DISPATCH[cls] = handler
+    return handler
+
+
 ########################################################################
 # utility functions
 ########################################################################
 
-_MAX_PLACEHOLDER = 9999999
-_CURRENT_PLACEHOLDER = 0
-def next_placeholder() -> str:
-    global _CURRENT_PLACEHOLDER
-    if _CURRENT_PLACEHOLDER > _MAX_PLACEHOLDER:
-        _CURRENT_PLACEHOLDER = 1
+_PLACEHOLDER_RE = re.compile(r':(\d+)')
+
+def _sql_literal(value) -> str:
+    "Format a placeholder value the way it would be written in SQL"
+    if value is None:
+        return 'NULL'
+    elif type(value) is str:
+        return "'" + value.replace("'", "''") + "'"
+    elif type(value) in (bytes, bytearray, memoryview):
+        return f"X'{bytes(value).hex().upper()}'"
     else:
-        _CURRENT_PLACEHOLDER += 1
-    return f':{_CURRENT_PLACEHOLDER}'
+        return str(value)
+
+# next() on an itertools.count runs in C, so it is atomic under the GIL
+# and placeholder names stay unique across threads without a lock
+_PLACEHOLDER_COUNTER = count(1)
+def next_placeholder() -> str:
+    return f':{next(_PLACEHOLDER_COUNTER)}'
 
 def type_(value):
     """
@@ -403,16 +519,18 @@ def type_(value):
     expression, or function is likely to return.
     """
     if hasattr(value, '__module__') and value.__module__ == 'hissdb.column':
-        type_str = value.type
-        if type_str == 'INTEGER':
+        # use SQLite's rules for a declared type's affinity, so that e.g.
+        # VARCHAR(20) columns are concatenated with || rather than added
+        type_str = value.type.upper()
+        if 'INT' in type_str:
             return int
-        elif type_str == 'REAL':
-            return float
-        elif type_str == 'TEXT':
+        elif 'CHAR' in type_str or 'CLOB' in type_str or 'TEXT' in type_str:
             return str
-        elif type_str == 'BLOB':
+        elif 'BLOB' in type_str:
             return bytes
-        elif type_str.lower() == 'timestamp':
+        elif 'REAL' in type_str or 'FLOA' in type_str or 'DOUB' in type_str:
+            return float
+        elif type_str == 'TIMESTAMP':
             return datetime
         else:
             raise NotImplementedError(
@@ -444,7 +562,7 @@ def type_(value):
                 return type_(value.args[0])
         elif value.func in ['COUNT', 'LENGTH', 'RANDOM']:
             return int
-        elif value.func == ['AVG', 'CEIL', 'FLOOR', 'ROUND']:
+        elif value.func in ['AVG', 'CEIL', 'FLOOR', 'ROUND']:
             return float
         elif value.func in [
             'UPPER', 'LOWER', 'SUBSTR', 'LTRIM',
@@ -2,285 +2,85 @@
 This module translates SQLite functions into Expression objects
 that you can include in Statements.
 
+Each function takes the same positional arguments as the SQLite
+function of the same name, and aggregate functions also accept
+distinct=True to add the DISTINCT keyword. The wrappers are generated
+from the tables below, since they differ only in the name of the
+SQLite function they produce.
+
 For function documentation, see
 https://sqlite.org/lang_corefunc.html#glob
 """
 
-from .expression import Expression as Expr
-
-def acos(x) -> Expr:
-    return Expr(x, func='ACOS')
-
-def acosh(x) -> Expr:
-    return Expr(x, func='ACOSH')
-
-def asin(x) -> Expr:
-    return Expr(x, func='ASIN')
-
-def asinh(x) -> Expr:
-    return Expr(x, func='ASINH')
-
-def atan(x) -> Expr:
-    return Expr(x, func='ATAN')
-
-def atan2(x, y) -> Expr:
-    return Expr(x, y, func='ATAN2')
-
-def atanh(x) -> Expr:
-    return Expr(x, func='ATANH')
-
-def avg(x, distinct: bool = False) -> Expr:
-    return Expr(x, func='AVG', prefix='DISTINCT' if distinct else None)
+from functools import partial
 
-def ceil(x) -> Expr:
-    return Expr(x, func='CEIL')
-
-def changes() -> Expr:
-    return Expr(func='CHANGES')
-
-def char(*args) -> Expr:
-    return Expr(*args, func='CHAR')
+from .expression import Expression as Expr
 
-def coalesce(*args) -> Expr:
-    return Expr(*args, func='COALESCE')
+# functions that take exactly one argument
+_UNARY = (
+    'acos', 'acosh', 'asin', 'asinh', 'atan', 'atanh', 'ceil', 'cos',
+    'cosh', 'degrees', 'exists', 'exp', 'floor', 'hex', 'length',
+    'likely', 'ln', 'log10', 'log2', 'lower', 'quote', 'radians',
+    'randomblob', 'sign', 'sin', 'sinh', 'soundex',
+    'sqlite_compileoption_get', 'sqlite_compileoption_used',
+    'sqlite_offset', 'tan', 'tanh', 'trunc', 'typeof', 'unicode',
+    'unlikely', 'upper', 'zeroblob',
+)
+
+# functions that take any number of arguments, including optional ones
+_NARY = (
+    'atan2', 'changes', 'char', 'coalesce', 'date', 'datetime', 'glob',
+    'ifnull', 'iif', 'instr', 'julianday', 'like', 'likelihood',
+    'load_extension', 'log', 'ltrim', 'mod', 'nullif', 'pi', 'pow',
+    'power', 'printf', 'random', 'replace', 'round', 'rtrim',
+    'sqlite_source_id', 'sqlite_version', 'strftime', 'substr', 'time',
+    'total_changes', 'trim',
+)
+
+# aggregate functions that accept the DISTINCT keyword
+_DISTINCT = ('avg', 'group_concat', 'max', 'min', 'sum', 'total')
+
+_DISTINCT_PREFIX = 'DISTINCT'
+
+
+def _unary(func: str):
+    def wrapper(x) -> Expr:
+        return Expr(x, func=func)
+    return wrapper
+
+def _nary(func: str) -> partial:
+    """
+    Wrapper for a function that takes any number of arguments. A
+    partial is implemented in C, so calling it skips a Python-level
+    frame. Unary functions keep a closure, so the arity is checked.
+    """
+    return partial(Expr, func=func)
+
+def _distinct(func: str):
+    def wrapper(*args, distinct: bool = False) -> Expr:
+        prefix = _DISTINCT_PREFIX if distinct else None
+        return Expr(*args, func=func, prefix=prefix)
+    return wrapper
+
+
+for _names, _factory in (
+    (_UNARY, _unary),
+    (_NARY, _nary),
+    (_DISTINCT, _distinct),
+):
+    for _name in _names:
+        _func = _factory(_name.upper())
+        _func.__name__ = _func.__qualname__ = _name
+        _func.__doc__ = f'SQLite {_name.upper()}() function'
+        globals()[_name] = _func
+del _names, _factory, _name, _func
 
-def cos(x) -> Expr:
-    return Expr(x, func='COS')
 
-def cosh(x) -> Expr:
-    return Expr(x, func='COSH')
-    
 def count(*args, distinct: bool = False) -> Expr:
+    "SQLite COUNT() function. With no arguments, counts all rows."
     args = args or ['*']
-    return Expr(
-        *args,
-        func = 'COUNT',
-        prefix = ('DISTINCT' if distinct else None),
-    )
-
-def date(time_value, *modifiers) -> Expr:
-    return Expr(time_value, *modifiers, func='DATE')
-
-def datetime(time_value, *modifiers) -> Expr:
-    return Expr(time_value, *modifiers, func='DATETIME')
-
-def degrees(x) -> Expr:
-    return Expr(x, func='DEGREES')
-
-def exists(x) -> Expr:
-    return Expr(x, func='EXISTS')
-
-def exp(x) -> Expr:
-    return Expr(x, func='EXP')
-
-def floor(x) -> Expr:
-    return Expr(x, func='FLOOR')
-    
-def glob(*args) -> Expr:
-    return Expr(*args, func='GLOB')
-
-def group_concat(x, y = None, distinct: bool = False) -> Expr:
-    prefix = 'DISTINCT' if distinct else None
-    if y:
-        return Expr(x, y, func='GROUP_CONCAT', prefix=prefix)
-    else:
-        return Expr(x, func='GROUP_CONCAT', prefix=prefix)
-
-def hex(x) -> Expr:
-    return Expr(x, func='HEX')
-
-def ifnull(x, y) -> Expr:
-    return Expr(x, y, func='IFNULL')
-
-def iif(x, y, z) -> Expr:
-    return Expr(x, y, z, func='IIF')
-
-def instr(x, y) -> Expr:
-    return Expr(x, y, func='INSTR')
-
-def julianday(time_value, *modifiers) -> Expr:
-    return Expr(time_value, *modifiers, func='JULIANDAY')
-
-def length(x) -> Expr:
-    return Expr(x, func='LENGTH')
-
-def like(x, y, z = None) -> Expr:
-    if z:
-        return Expr(x, y, z, func='LIKE')
-    else:
-        return Expr(x, y, func='LIKE')
-
-def likelihood(x, y) -> Expr:
-    return Expr(x, y, func='LIKELIHOOD')
-
-def likely(x) -> Expr:
-    return Expr(x, func='LIKELY')
-
-def ln(x) -> Expr:
-    return Expr(x, func='LN')
-
-def load_extension(x, y = None) -> Expr:
-    if y:
-        return Expr(x, y, func='LOAD_EXTENSION')
-    else:
-        return Expr(x, func='LOAD_EXTENSION')
-
-def log(x, y = None) -> Expr:
-    if y:
-        return Expr(x, y, func='LOG')
-    else:
-        return Expr(x, func='LOG')
-
-def log10(x) -> Expr:
-    return Expr(x, func='LOG10')
-
-def log2(x) -> Expr:
-    return Expr(x, func='LOG2')
-
-def lower(x) -> Expr:
-    return Expr(x, func='LOWER')
-
-def ltrim(x, y = None) -> Expr:
-    if y:
-        return Expr(x, y, func='LTRIM')
-    else:
-        return Expr(x, func='LTRIM')
-
-def max(*args, distinct: bool = False) -> Expr:
-    return Expr(
-        *args,
-        func='MAX',
-        prefix='DISTINCT' if distinct else None
-    )
-
-def min(*args, distinct: bool = False) -> Expr:
-    return Expr(
-        *args,
-        func='MIN',
-        prefix='DISTINCT' if distinct else None
-    )
-
-def mod(x) -> Expr:
-    return Expr(x, func='MOD')
-
-def nullif(x, y) -> Expr:
-    return Expr(x, y, func='NULLIF')
-
-def pi() -> Expr:
-    return Expr(func='PI')
-
-def pow(x, y) -> Expr:
-    return Expr(x, y, func='POW')
-
-def power(x, y) -> Expr:
-    return Expr(x, y, func='POWER')
-
-def printf(format_str, *placeholders) -> Expr:
-    return Expr(format_str, *placeholders, func='PRINTF')
-
-def quote(x) -> Expr:
-    return Expr(x, func='QUOTE')
-
-def radians(x) -> Expr:
-    return Expr(x, func='RADIANS')
-
-def random() -> Expr:
-    return Expr(func='RANDOM')
-
-def randomblob(n) -> Expr:
-    return Expr(n, func='RANDOMBLOB')
-
-def replace(x, y, z) -> Expr:
-    return Expr(x, y, z, func='REPLACE')
-
-def round(x, y = None) -> Expr:
-    if y:
-        return Expr(x, y, func='ROUND')
-    else:
-        return Expr(x, func='ROUND')
-
-def rtrim(x, y = None) -> Expr:
-    if y:
-        return Expr(x, y, func='RTRIM')
-    else:
-        return Expr(x, func='RTRIM')
-
-def sign(x) -> Expr:
-    return Expr(x, func='SIGN')
-
-def sin(x) -> Expr:
-    return Expr(x, func='SIN')
-
-def sinh(x) -> Expr:
-    return Expr(x, func='SINH')
-
-def soundex(x) -> Expr:
-    return Expr(x, func='SOUNDEX')
-
-def sqlite_compileoption_get(n) -> Expr:
-    return Expr(n, func='SQLITE_COMPILEOPTION_GET')
-
-def sqlite_compileoption_used(x) -> Expr:
-    return Expr(x, func='SQLITE_COMPILEOPTION_USED')
-
-def sqlite_offset(x) -> Expr:
-    return Expr(x, func='SQLITE_OFFSET')
-
-def sqlite_source_id() -> Expr:
-    return Expr(func='SQLITE_SOURCE_ID')
-
-def sqlite_version() -> Expr:
-    return Expr(func='SQLITE_VERSION')
-
-def strftime(format_str, time_value, *modifiers) -> Expr:
-    return Expr(format_str, time_value, *modifiers, func='STRFTIME')
-
-def substr(x, y, z = None) -> Expr:
-    if z:
-        return Expr(x, y, z, func='SUBSTR')
-    else:
-        return Expr(x, y, func='SUBSTR')
-
-def sum(x, distinct: bool = False) -> Expr:
-    return Expr(x, func='SUM', prefix='DISTINCT' if distinct else None)
-
-def tan(x) -> Expr:
-    return Expr(x, func='TAN')
-
-def tanh(x) -> Expr:
-    return Expr(x, func='TANH')
-
-def time(time_value, *modifiers) -> Expr:
-    return Expr(time_value, *modifiers, func='TIME')
-
-def total(x, distinct: bool = False) -> Expr:
-    return Expr(
-        x, func='TOTAL', prefix='DISTINCT' if distinct else None
-     )
-
-def total_changes() -> Expr:
-    return Expr(func='SQLITE_VERSION')
-
-def trim(x, y = None) -> Expr:
-    if y:
-        return Expr(x, y, func='TRIM')
-    else:
-        return Expr(x, func='TRIM')
-
-def trunc(x) -> Expr:
-    return Expr(x, func='TRUNC')
-
-def typeof(x) -> Expr:
-    return Expr(x, func='TYPEOF')
-
-def unicode(x) -> Expr:
-    return Expr(x, func='UNICODE')
-
-def unlikely(x) -> Expr:
-    return Expr(x, func='UNLIKELY')
+    prefix = _DISTINCT_PREFIX if distinct else None
+    return Expr(*args, func='COUNT', prefix=prefix)
 
-def upper(x) -> Expr:
-    return Expr(x, func='UPPER')
 
-def zeroblob(x) -> Expr:
-    return Expr(x, func='ZEROBLOB')
+__all__ = sorted([*_UNARY, *_NARY, *_DISTINCT, 'count'])
@@ -1,18 +1,27 @@
 # python standard imports
 from __future__ import annotations
-from copy import copy
+from collections import deque
+from functools import lru_cache
+from itertools import chain, islice
 from sqlite3 import Cursor
 
 # internal imports
-from .expression import Expression
+from .expression import Expression, _SEQ_TYPES
 from .column import Column
 
 class BaseStatement(Expression):
     "base class that all Statements inherit from"
+    
+    # attributes where parts of the rendered statement are cached
+    _caches = (
+        '_clauses_cache', '_placeholders_cache', '_necessary_tables_cache',
+        '_str_cache',
+    )
+    
     def __init__(self,
         table,
         where: Expression = None,
-        join: dict = {},
+        join: dict = None,
         order_by: tuple[Expression] = None,
         limit: int = None,
         offset: int = None,
@@ -47,23 +56,54 @@ class BaseStatement(Expression):
                 key relationships to automatically join any tables that
                 the statement requires. Defaults to True.
         """
-        self.table = table
-        self.where: Expression = where
-        self.join = join
-        self.order_by: tuple[Expression] = None
-        self.limit: int = limit
-        self.offset: int = offset
-        # self.union = union
-        # self.union_all = union_all
-        # self.intersect = intersect
+        if order_by and not isinstance(order_by, _SEQ_TYPES):
+            order_by = [order_by]
         
-        self.autojoin: bool = autojoin
-        self.unknown_kwargs = kwargs
-        
-        if order_by and type(order_by) not in [list, tuple, set]:
-            self.order_by = [order_by]
-        else:
-            self.order_by = order_by
+        # nothing can be cached yet, so skip __setattr__'s invalidation
+        self.__dict__.update(
+            table = table,
+            where = where,
+            join = {} if join is None else join,
+            order_by = order_by,
+            limit = limit,
+            offset = offset,
+            # union = union,
+            # union_all = union_all,
+            # intersect = intersect,
+            autojoin = autojoin,
+            unknown_kwargs = kwargs,
+        )
+    
+    def __setattr__(self, attr: str, value):
+        "Clear cached rendering whenever a part of the statement changes"
+        object.__setattr__(self, attr, value)
+        # nothing is cached while the statement is being built, so this
+        # costs nothing until it has been rendered at least once
+        if self.__dict__.get('_has_cache') and not attr.startswith('_'):
+            self._invalidate()
+    
+    def _invalidate(self):
+        """
+        Forget the cached clauses, placeholders, necessary tables, and
+        rendered SQL. This happens automatically when an attribute is
+        reassigned, but must be called manually after modifying one in
+        place.
+        """
+        for cache in self._caches:
+            self.__dict__.pop(cache, None)
+        self.__dict__['_has_cache'] = False
+    
+    def _cached(self, cache: str, build):
+        """
+        Return the value stored in the given cache attribute, or call
+        build() to make it and store it there first.
+        """
+        value = self.__dict__.get(cache)
+        if value is None:
+            value = build()
+            self.__dict__[cache] = value
+            self.__dict__['_has_cache'] = True
+        return value
     
     def execute(self) -> Cursor:
         return self._db.execute(
@@ -72,7 +112,7 @@ class BaseStatement(Expression):
         )
     
     def __str__(self):
-        return '\n'.join(self.clauses)
+        return self._cached('_str_cache', lambda: '\n'.join(self.clauses))
     
     def __repr__(self):
         return (
@@ -92,72 +132,116 @@ class BaseStatement(Expression):
     
     @property
     def clauses(self) -> list[str]:
+        # subclasses modify the list they get, so give them a copy
+        return list(self._cached('_clauses_cache', self._build_clauses))
+    
+    def _build_clauses(self) -> list[str]:
         if self.autojoin:
-            joins = implicit_join(
-                start_table = self.table,
-                target_tables = self._necessary_tables,
-                prior_joins = self.join,
-            )
+            joins = self._implicit_joins()
         else:
             joins = self.join
         
+        clauses = [f'FROM {self.table}']
+        clauses.extend(f'JOIN {k} ON {v}' for k, v in joins.items())
+        if self.where:
+            clauses.append(f'WHERE {self.where}')
         if self.order_by:
             order_str = ', '.join([str(o) for o in self.order_by])
-        
-        return list(filter(lambda x: bool(x), [
-            f'FROM {self.table}',
-            *[f'JOIN {k} ON {v}' for k,v in joins.items()],
-            (f'WHERE {self.where}' if self.where else ''),
-            (f'ORDER BY {order_str}' if self.order_by else ''),
-            (f'LIMIT {self.limit}' if self.limit else ''),
-            (f'OFFSET {self.offset}' if self.offset else ''),
-            # (f'UNION\n{self.union}' if self.union else ''),
-            # (f'UNION ALL\n{self.union_all}' if self.union_all else ''),
-            # (f'INTERSECT\n{self.intersect}' if self.intersect else ''),
-        ]))
+            clauses.append(f'ORDER BY {order_str}')
+        if self.limit:
+            clauses.append(f'LIMIT {self.limit}')
+        if self.offset:
+            clauses.append(f'OFFSET {self.offset}')
+        # if self.union:
+        #     clauses.append(f'UNION\n{self.union}')
+        # if self.union_all:
+        #     clauses.append(f'UNION ALL\n{self.union_all}')
+        # if self.intersect:
+        #     clauses.append(f'INTERSECT\n{self.intersect}')
+        return clauses
+    
+    def _implicit_joins(self) -> dict:
+        """
+        Run implicit_join() for this statement. The result is kept until
+        the table, the necessary tables, or the manual joins change, so
+        it survives edits to unrelated parts of the statement.
+        """
+        key = (
+            self.table,
+            *self._necessary_tables,
+            None,  # separates the tables from the manual joins
+            *chain.from_iterable(self.join.items()),
+        )
+        memo = self.__dict__.get('_joins_memo')
+        # compare by identity, since Expression.__eq__ builds a new
+        # Expression rather than returning a bool
+        if (
+            memo is not None
+            and len(memo[0]) == len(key)
+            and all(a is b for a, b in zip(memo[0], key))
+        ):
+            return memo[1]
+        joins = implicit_join(
+            start_table = self.table,
+            target_tables = self._necessary_tables,
+            prior_joins = self.join,
+        )
+        self.__dict__['_joins_memo'] = (key, joins)
+        return joins
     
     @property
-    def _necessary_tables(self) -> list:
-        necessary_tables = []
-        for val in self.__dict__.values():
-            if not val:
-                pass
-            elif val.__class__.__module__ == 'hissdb.table':
-                necessary_tables.append(val)
-            elif hasattr(val, '_necessary_tables'):
-                necessary_tables += val._necessary_tables
+    def _necessary_tables(self) -> dict:
+        return self._cached(
+            '_necessary_tables_cache', self._find_necessary_tables
+        )
+    
+    def _find_necessary_tables(self) -> dict:
+        # imported here because the table module imports this one
+        from .table import Table
+        
+        # a dict rather than a set, so the tables keep a stable order.
+        # the _necessary_tables of Columns, Expressions, and statements
+        # are dicts too, so they can be merged in with update()
+        necessary_tables = {}
+        for key, val in self.__dict__.items():
+            if not val or key[0] == '_':
+                continue
+            if isinstance(val, Table):
+                necessary_tables[val] = None
+                continue
+            tables = getattr(val, '_necessary_tables', None)
+            if tables is not None:
+                necessary_tables.update(tables)
             elif type(val) is list and hasattr(val[0], '_necessary_tables'):
                 for item in val:
-                    necessary_tables += item._necessary_tables
+                    necessary_tables.update(item._necessary_tables)
             elif type(val) is dict:
                 for item in [*val.keys(), *val.values()]:
-                    if not hasattr(item, '_necessary_tables'):
-                        continue
-                    necessary_tables += item._necessary_tables
-        return list(set(necessary_tables))
+                    if hasattr(item, '_necessary_tables'):
+                        necessary_tables.update(item._necessary_tables)
+        return necessary_tables
     
     @property
     def placeholders(self) -> dict:
+        return self._cached('_placeholders_cache', self._find_placeholders)
+    
+    def _find_placeholders(self) -> dict:
         placeholders = {}
         for key, val in self.__dict__.items():
-            if not val:
-                pass
-            elif hasattr(val, 'placeholders'):
-                placeholders.update(val.placeholders)
-            elif type(val) is list and hasattr(val[0], 'placeholders'):
-                for item in val:
-                    placeholders.update(item.placeholders)
+            if not val or key.startswith('_'):
+                continue
+            val_placeholders = getattr(val, 'placeholders', None)
+            if val_placeholders is not None:
+                placeholders.update(val_placeholders)
             elif (
-                type(val) is list and 
-                len(val) > 0 and
-                hasattr(val[0], 'placeholders')
+                isinstance(val, (list, tuple))
+                and hasattr(val[0], 'placeholders')
             ):
                 for item in val:
                     placeholders.update(item.placeholders)
             elif (
-                type(val) is dict and
-                len(val) > 0 and
-                hasattr(list(val.values())[0], 'placeholders')
+                isinstance(val, dict)
+                and hasattr(next(iter(val.values())), 'placeholders')
             ):
                 for item in val.values():
                     placeholders.update(item.placeholders)
@@ -175,7 +259,10 @@ class BaseStatement(Expression):
 
 class Insert(BaseStatement):
     "SQL statement to insert a single row into a table"
-    def __init__(self, table, row: dict = {}, or_: str = None, **kwargs):
+    
+    _caches = BaseStatement._caches + ('_insert_sql_cache',)
+    
+    def __init__(self, table, row: dict = None, or_: str = None, **kwargs):
         """
         Insert statement constructor. Any unknown keyword arguments will
         be added to the row dict.
@@ -189,8 +276,10 @@ class Insert(BaseStatement):
         """
         super().__init__(table=table, **kwargs)
         self.or_ = or_
+        if row is None:
+            row = {}
         if self.unknown_kwargs:
-            row = copy(row)
+            row = row.copy()
             row.update(self.unknown_kwargs)
         self.row = {k: Expression(v) for k,v in row.items()}
     
@@ -207,21 +296,29 @@ class Insert(BaseStatement):
     @property
     def clauses(self):
         return [
+            self._cached('_insert_sql_cache', self._insert_clause)
+        ] + super().clauses[1:] # skip the FROM clause
+    
+    def _insert_clause(self) -> str:
+        "The INSERT INTO ... VALUES ... clause"
+        return (
             'INSERT'
             + (f' OR {self.or_}' if self.or_ else '')
-            + f' INTO {self.table} ({", ".join(self.row.keys())})'
-            + f' VALUES ({", ".join([str(v) for v in self.row.values()])})'
-        ] + super().clauses[1:] # skip the FROM clause
+            + f' INTO {self.table} ({", ".join(self.row)})'
+            + f' VALUES ({", ".join(map(str, self.row.values()))})'
+        )
 
 
 
 class InsertMany(BaseStatement):
     "SQL statement to efficiently insert a list or generator of rows"
+    
     def __init__(self,
         table,
         cols: tuple[Column],
         rows: list[tuple],
         or_: str = None,
+        unroll: int = None,
         **kwargs
     ):
         """
@@ -233,32 +330,104 @@ class InsertMany(BaseStatement):
                 be provided.
             rows: list or generator containing each row to insert. A row
                 is a tuple whose values each represent the corresponding
-                value in cols.
+                value in cols. Rows are only iterated once, when the
+                statement is executed, so a generator is streamed to
+                SQLite without being loaded into memory.
             or_: what to do when the insert statement fails due to a
                 table constraint. Options are 'ABORT', 'FAIL', 'IGNORE',
                 'REPLACE', and 'ROLLBACK'.
+            unroll: if provided, insert up to this many rows per
+                statement, using a single 'VALUES (...), (...), ...'
+                clause for each batch instead of running the statement
+                once per row. This is faster for very large inserts.
+                Batches are shrunk if needed to stay under SQLite's
+                limit on the number of placeholders per statement.
         """
         super().__init__(table = table, **kwargs)
         self.or_ = or_
         self.cols = [self._resolve_column(col) for col in cols]
+        if not self.cols:
+            raise ValueError('InsertMany needs at least one column')
         self.rows = rows
+        self.unroll = unroll
     
 
     def execute(self) -> Cursor:
-        return self._db.execute(
-            statement = str(self),
-            placeholders = self.rows,
-            many=True
-        )
+        """
+        Insert the rows and return the cursor. The total number of rows
+        inserted is also stored in self.rowcount, since with unroll
+        the cursor only reflects the final batch.
+        """
+        if not self.unroll:
+            cur = self._db.execute(
+                statement = str(self),
+                placeholders = self.rows,
+                many=True
+            )
+            self.rowcount = cur.rowcount
+            return cur
+        
+        batch_size = max(1, min(
+            self.unroll,
+            _MAX_VARIABLE_NUMBER // len(self.cols),
+        ))
+        other_clauses = super().clauses[1:]
+        rows = iter(self.rows)
+        cur = None
+        self.rowcount = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            cur = self._db.execute(
+                statement = '\n'.join(
+                    [self._insert_clause(len(batch))] + other_clauses
+                ),
+                placeholders = list(chain.from_iterable(batch)),
+                many = False,
+            )
+            self.rowcount += cur.rowcount
+        return cur
+    
+    @property
+    def placeholders(self) -> dict:
+        # the rows fill positional '?' placeholders rather than named
+        # ones, so they must not be walked (or consumed) looking for any
+        return {}
     
     @property
     def clauses(self):
         return [
-            'INSERT'
-            + (f' OR {self.or_}' if self.or_ else '')
-            +f' INTO {self.table} ({", ".join([c._name for c in self.cols])})'
-            + f' VALUES ({", ".join(["?" for col in self.cols])})'
+            self._insert_clause()
         ] + super().clauses[1:] # skip the FROM clause
+    
+    def _insert_clause(self, row_count: int = 1) -> str:
+        "The INSERT clause, with placeholders for the given number of rows"
+        # the template only depends on or_, table, and cols, so it is
+        # compiled once and reused for each render and batch
+        prefix, row = self._compile(
+            str(self.table), tuple([c._name for c in self.cols]), self.or_
+        )
+        if row_count == 1:
+            return prefix + row
+        return prefix + ', '.join([row] * row_count)
+    
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _compile(table_name: str, cols: tuple[str], or_: str = None):
+        """
+        Return the 'INSERT ... VALUES ' prefix and a '(?, ...)' row for
+        the given table and column names. The result only depends on
+        the arguments, so it is shared by every statement that inserts
+        into the same columns.
+        """
+        return (
+            'INSERT'
+            + (f' OR {or_}' if or_ else '')
+            + f' INTO {table_name} ({", ".join(cols)})'
+            + ' VALUES ',
+            f'({_placeholders(len(cols))})',
+        )
         
 
 
@@ -275,6 +444,11 @@ class Delete(BaseStatement):
 
 class Select(BaseStatement):
     "SQL statement to return some or all rows meeting given criteria"
+    
+    _caches = BaseStatement._caches + (
+        '_select_sql_cache', '_group_by_sql_cache',
+    )
+    
     def __init__(self,
         table,
         cols: list[Column] = '*',
@@ -302,62 +476,75 @@ class Select(BaseStatement):
             having: equivalent to SQL 'HAVING' clause
         """
         super().__init__(table = table, where = where, **kwargs)
-        self.raw_columns = cols
         for key, val in self.unknown_kwargs.items():
             new_criteria = Expression(self.table._columns[key], '=', val)
-            if self.where:
-                self.where = self.where & new_criteria
+            if where:
+                where = where & new_criteria
             else:
-                self.where = new_criteria
+                where = new_criteria
         
-        if self.raw_columns == '*' or type(self.raw_columns) is Expression:
-            self.columns = self.raw_columns
+        if cols == '*' or type(cols) is Expression:
+            columns = cols
         else:
-            self.columns = [self._resolve_column(c) for c in self.raw_columns]
+            columns = [self._resolve_column(c) for c in cols]
         
         if group_by:
-            if type(group_by) in [list, set, tuple]:
-                self.group_by = [self._resolve_column(c) for c in group_by]
+            if isinstance(group_by, _SEQ_TYPES):
+                group_by = [self._resolve_column(c) for c in group_by]
             else:
-                self.group_by = self._resolve_column(group_by)
+                group_by = self._resolve_column(group_by)
         else:
-            self.group_by = None
+            group_by = None
             if having:
                 raise SyntaxError(
                     "statements can't include `having` without `group_by`"
                 )
-        self.having = having
+        
+        # nothing can be cached yet, so skip __setattr__'s invalidation
+        self.__dict__.update(
+            raw_columns = cols,
+            where = where,
+            columns = columns,
+            group_by = group_by,
+            having = having,
+        )
     
     @property
     def clauses(self):
-        if type(self.columns) in [list, tuple, set]:
-            select = f'SELECT {", ".join([str(c) for c in self.columns])}'
-        else:
-            select = f'SELECT {self.columns}'
+        select = self._cached('_select_sql_cache', self._select_clause)
         clauses = [select] + super().clauses
         
         if self.group_by:
-            if self.group_by:
-                if type(self.group_by) in [list, tuple, set]:
-                    group_by_clause = f'GROUP BY ({", ".join(self.group_by)})'
-                else:
-                    group_by_clause = f'GROUP BY {self.group_by}'
-            
+            group_by_clauses = self._cached(
+                '_group_by_sql_cache', self._group_by_clauses
+            )
             # insert *before* LIMIT or ORDER BY clauses, if present
-            group_by_clause = f'GROUP BY {self.group_by}'            
             for i, cl in enumerate(clauses):
                 if cl.startswith('ORDER BY') or cl.startswith('LIMIT'):
-                    clauses.insert(i, group_by_clause)
-                    if self.having is not None:
-                        clauses.insert(i+1, f'HAVING {self.having}')
+                    clauses[i:i] = group_by_clauses
                     break
             else:
-                clauses.append(group_by_clause)
-                if self.having is not None:
-                    clauses.append(f'HAVING {self.having}')
+                clauses += group_by_clauses
         
         return clauses
     
+    def _group_by_clauses(self) -> list[str]:
+        "The GROUP BY clause, followed by the HAVING clause if any"
+        if isinstance(self.group_by, _SEQ_TYPES):
+            group_by = ', '.join([str(c) for c in self.group_by])
+        else:
+            group_by = str(self.group_by)
+        clauses = [f'GROUP BY {group_by}']
+        if self.having is not None:
+            clauses.append(f'HAVING {self.having}')
+        return clauses
+    
+    def _select_clause(self) -> str:
+        if isinstance(self.columns, _SEQ_TYPES):
+            return f'SELECT {", ".join([str(c) for c in self.columns])}'
+        else:
+            return f'SELECT {self.columns}'
+    
     def __and__(self, other):
         return Intersect(self, other)
     
@@ -368,8 +555,11 @@ class Select(BaseStatement):
 
 
 class Update(BaseStatement):
-    def __init__(self, updates: dict[Column, Expression] = {}, **kwargs):
-        self.raw_updates = updates
+    
+    _caches = BaseStatement._caches + ('_set_sql_cache',)
+    
+    def __init__(self, updates: dict[Column, Expression] = None, **kwargs):
+        self.raw_updates = {} if updates is None else updates
         super().__init__(**kwargs)
         self.updates = {}
         for key, val in self.raw_updates.items():
@@ -382,16 +572,19 @@ class Update(BaseStatement):
     
     @property
     def clauses(self):
-        update_strs = [f'{k._name} = {v}' for k, v in self.updates.items()]
         clauses = [
             f'UPDATE {self.table}',
-            f'SET {", ".join(update_strs)}'
+            self._cached('_set_sql_cache', self._set_clause),
         ] + super().clauses
         for i, clause in enumerate(clauses):
             if clause.startswith('FROM'):
                 clauses[i] += ' AS hissdb_placeholder'
                 break
         return clauses
+    
+    def _set_clause(self) -> str:
+        update_strs = [f'{k._name} = {v}' for k, v in self.updates.items()]
+        return f'SET {", ".join(update_strs)}'
 
 
 ########################################################################
@@ -410,14 +603,18 @@ class Union(Select):
     
     @property
     def placeholders(self):
-        results = self.statements[0].placeholders
+        results = dict(self.statements[0].placeholders)
         for statement in self.statements[1:]:
             results.update(statement.placeholders)
         return results
     
+    def __str__(self):
+        # the statements can change independently, so don't cache this
+        return '\n'.join(self.clauses)
+    
     @property
     def clauses(self):
-        results = copy(self.statements[0].clauses)
+        results = list(self.statements[0].clauses)
         for statement in self.statements[1:]:
             results.append(self.joiner_clause)
             results += statement.clauses
@@ -439,95 +636,94 @@ class Except(Union):
 # utility functions
 ########################################################################
 
+# the lowest value SQLite has used for SQLITE_MAX_VARIABLE_NUMBER, i.e.
+# the maximum number of placeholders allowed in a single statement
+_MAX_VARIABLE_NUMBER = 999
+
+# '?, ?, ...' strings for up to 128 positional placeholders
+_PLACEHOLDERS = tuple(', '.join('?' * n) for n in range(129))
+
+def _placeholders(n: int) -> str:
+    "Return a string of n comma-separated '?' placeholders"
+    if n < len(_PLACEHOLDERS):
+        return _PLACEHOLDERS[n]
+    return ', '.join('?' * n)
+
 def implicit_join(
     start_table: list,
     target_tables: list,
-    prior_joins: dict = {},
+    prior_joins: dict = None,
 ) -> dict:
     """
     Return a dictionary of joins necessary to bridge the gap from the
     provided tables to the target tables, assuming that it is possible
     to do so via some combination of foreign keys. Otherwise, raise a
     SyntaxError.
+    
+    Each missing table is reached by the shortest chain of foreign keys
+    from the tables that are already available, found with a
+    breadth-first search in either direction along each foreign key.
     """
-    joins = copy(prior_joins)
-    available_tables = [start_table] + list(prior_joins.keys())
+    if prior_joins is None:
+        prior_joins = {}
+    # prior_joins is only copied once a join actually has to be added
+    joins = prior_joins
+    # a dict rather than a set, to keep the search order deterministic
+    available_tables = dict.fromkeys([start_table, *prior_joins.keys()])
+    graph = {}
     
-    i = 0
-    while i < len(target_tables):
-        necessary_table = target_tables[i]
+    for necessary_table in target_tables:
         if necessary_table in available_tables:
-            i += 1
             continue
-        for a in available_tables:
-            forward_joins = _implicit_join_helper(a, necessary_table, joins)
-            if necessary_table in forward_joins:
-                new_joins = forward_joins
-            else:
-                new_joins = _implicit_join_helper(
-                    a, necessary_table, joins, True
-                )
-            if necessary_table in new_joins:
-                joins = new_joins
-                available_tables.append(necessary_table)
-                i += 1
-                break
-        else:
+        
+        # breadth-first search outward from every available table
+        parents = {table: None for table in available_tables}
+        queue = deque(available_tables)
+        while queue and necessary_table not in parents:
+            table = queue.popleft()
+            for neighbor, condition in _join_neighbors(table, graph):
+                if neighbor not in parents:
+                    parents[neighbor] = (table, condition)
+                    queue.append(neighbor)
+        
+        if necessary_table not in parents:
             raise SyntaxError(
                 f'You must manually join table "{necessary_table}" for '
                 'this statement, because there is no obvious way to join '
                 'it via foreign keys.'
             )
+        
+        # walk back to an available table, then join in forward order
+        path = []
+        table = necessary_table
+        while parents[table] is not None:
+            parent, condition = parents[table]
+            path.append((table, condition))
+            table = parent
+        if joins is prior_joins:
+            joins = prior_joins.copy()
+        for table, condition in reversed(path):
+            joins[table] = condition
+            available_tables[table] = None
     return joins
 
 
-def _implicit_join_helper(
-    start_table,
-    target_table,
-    prior_joins: dict = {},
-    reverse: bool = False,
-) -> dict:
-    if reverse:
-        foreign_keys = target_table._foreign_keys
-    else:
-        foreign_keys = start_table._foreign_keys
-    if not foreign_keys:
-        return prior_joins
-    for key, foreign_key in foreign_keys.items():
-        if type(key) is str:
-            if reverse:
-                key = target_table[key]
-            else:
-                key = start_table[key]
-        if type(foreign_key) is str:
-            foreign_key = start_table._db[foreign_key]
-        
-        if (
-            (not reverse and foreign_key._table not in prior_joins)
-            or (reverse and key._table not in prior_joins)
-        ):
-            new_joins = copy(prior_joins)
-            expr = Expression(key, '=', foreign_key)
-            if reverse:
-                new_joins[key._table] = expr
-            else:
-                new_joins[foreign_key._table] = expr
-                
-        else:
-            new_joins = prior_joins
-        if (
-            (not reverse and foreign_key._table == target_table)
-            or (reverse and key._table == target_table)
-        ):
-            return new_joins
-        else:
-            recursion = _implicit_join_helper(
-                foreign_key._table,
-                target_table,
-                new_joins,
-                reverse,
-            )
-            if target_table in recursion:
-                return recursion
-    else:
-        return prior_joins
+def _join_neighbors(table, graph: dict) -> list:
+    """
+    Return a list of (table, Expression) tuples, one for each table the
+    given table can be joined to via a foreign key, in either direction,
+    along with the condition to join it on. Each table's neighbors are
+    found the first time the search reaches it, and stored in graph.
+    """
+    neighbors = graph.get(table)
+    if neighbors is None:
+        neighbors = []
+        for other in table._db._tables.values():
+            for condition in other._foreign_keys._join_conditions():
+                foreign_table = condition.args[2]._table
+                if other is table:
+                    neighbors.append((foreign_table, condition))
+                elif foreign_table is table:
+                    neighbors.append((other, condition))
+        graph[table] = neighbors
+    return neighbors
@@ -1,38 +1,57 @@
 # python standard imports
 from __future__ import annotations
+from collections.abc import Mapping
 from functools import cached_property
-from copy import copy
+from itertools import chain
 from sqlite3 import Cursor
-from re import finditer
-
-# internal imports# python standard imports
-from functools import cached_property
-from copy import copy
-from sqlite3 import Cursor
-from re import finditer, sub, match
+import re
 
 # internal imports
 from .column import Column
 from .statements import Insert, Select, Update, Delete, InsertMany
-from .expression import Expression
+from .expression import Expression, _LITERALS
 from .functions import count
 
+# a FOREIGN KEY clause, capturing the key, foreign table, and foreign
+# column, in either a raw or a normalized schema
+_FK_RE = re.compile(
+    r'FOREIGN KEY\s*\(\s*([^)]+?)\s*\)\s*'
+    r'REFERENCES\s+([^\s(]+)\s*\(\s*([^)]+?)\s*\)'
+)
+
+# for normalizing schemas: quotes to strip, and spaces just inside
+# parentheses
+_QUOTES = str.maketrans('', '', '"\'')
+_PAREN_PADDING_RE = re.compile(r'(?<=\() | (?=\))')
+
+# values that Table.insert() can bind to a '?' placeholder as they are
+_BINDABLE_TYPES = frozenset((int, float, str, bytes, type(None)))
+
+# attributes that Table keeps for itself, which can never be columns
+_INTERNAL_ATTRS = frozenset((
+    '_columns', '_foreign_key_refs', '_foreign_keys_cache', '_primary_key',
+    '_name', '_db',
+))
+
 class Table:
     def __init__(
         self,
-        columns: dict[str, Column] = {},
-        foreign_keys: dict[str, Column] = {},
+        columns: dict[str, Column] = None,
+        foreign_keys: dict[str, Column] = None,
         primary_key: tuple[Column] = (),
         **kwargs,
     ):
-        self._columns = {}
-        kwargs.update(columns)
-        for k, v in kwargs.items():
-            col = Column(name = k, constraints = v)
+        if columns:
+            kwargs = {**kwargs, **columns}
+        self._columns = {
+            k: Column(name = k, constraints = v) for k, v in kwargs.items()
+        }
+        for col in self._columns.values():
             col._table = self
-            self._columns[k] = col
         
-        self._foreign_keys = foreign_keys
+        # names of foreign key columns, and the columns they reference
+        self._foreign_key_refs = foreign_keys or {}
+        self._foreign_keys_cache = None
         self._primary_key = primary_key
         
         # these values are set when the table is assigned to a db
@@ -42,48 +61,66 @@ class Table:
     
     @classmethod
     def _from_schema(cls, schema: str):
+        return cls._from_parsed_schema(*cls._parse_schema(schema))
+    
+    
+    @classmethod
+    def _from_parsed_schema(
+        cls,
+        name: str,
+        columns: dict[str, str],
+        foreign_keys: dict[str, str],
+        primary_key: tuple[str],
+    ):
+        "Make a Table from the output of _parse_schema()"
+        table = cls(
+            foreign_keys = dict(foreign_keys),
+            primary_key = primary_key,
+            **columns
+        )
+        table._name = name
+        return table
+    
+    
+    @staticmethod
+    def _parse_schema(schema: str) -> tuple:
+        """
+        Read a CREATE TABLE statement and return a tuple of the table's
+        name, a dict of column constraints, a dict of foreign keys, and
+        the primary key.
+        """
         # normalize schema to something parseable with small regex
-        schema = sub(r'\s+', ' ', schema)
-        schema = schema.replace('"', '').replace("'", '')
-        schema = schema.replace('( ', '(').replace(' )', ')')
+        schema = ' '.join(schema.translate(_QUOTES).split())
+        schema = _PAREN_PADDING_RE.sub('', schema)
         
         # read column definitions and constraints from the schema
-        name = schema.split(' ', 3)[2]
+        head, _, body = schema.partition('(')
+        name = head.split()[-1]
+        body = body.rpartition(')')[0]
         columns, foreign_keys, = {}, {}
         primary_key = None
-        for clause in schema.split('(', 1)[1][:-1].split(', '):
+        for clause in _split_clauses(body):
             if clause.startswith('FOREIGN KEY'):
-                m = match(
-                    r'FOREIGN KEY ?\(?(.+?)\)? REFERENCES (.+?) ?\((.+?)\)',
-                    clause
-                )
+                m = _FK_RE.match(clause)
                 key_name = m.group(1)
                 foreign_table = m.group(2)
                 foreign_key = m.group(3)
                 foreign_keys[key_name] = f'{foreign_table}({foreign_key})'
             
             elif clause.startswith('PRIMARY KEY'):
-                keys_str = schema.split('(', 1)[1][:-1].strip("'\"")
+                keys_str = clause.partition('(')[2].rpartition(')')[0]
                 primary_key = tuple(keys_str.split(', '))
             
             else:
-                parts = clause.split(' ', 1)
-                col_name = parts[0]
-                constraints = parts[1] if len(parts) > 1 else None
-                columns[col_name] = constraints
+                col_name, _, constraints = clause.partition(' ')
+                columns[col_name] = constraints or None
         
-        table = cls(
-            foreign_keys = foreign_keys,
-            primary_key = primary_key,
-            **columns
-        )
-        table._name = name
-        return table
+        return name, columns, foreign_keys, primary_key
     
     
     def __getitem__(self, item):
         result = self._columns.get(item)
-        if result:
+        if result is not None:
             return result
         raise AttributeError(
             f"{self} has no column named '{item}'"
@@ -91,6 +128,10 @@ class Table:
     
     
     def __getattr__(self, attr):
+        # internal and dunder names are never columns, and are looked up
+        # often (e.g. by copy, pickle, and REPLs), so fail fast
+        if attr in _INTERNAL_ATTRS or attr.startswith('__'):
+            raise AttributeError(attr)
         return self[attr]
     
     
@@ -107,10 +148,12 @@ class Table:
     
     
     def __setattr__(self, attr, value):
-        if type(value) is Column:
+        # internal attributes are set often (e.g. in __init__) and are
+        # never columns, so check for them first
+        if attr not in _INTERNAL_ATTRS and isinstance(value, Column):
             self[attr] = value
         else:
-            super().__setattr__(attr, value)
+            object.__setattr__(self, attr, value)
     
     
     def __delattr__(self, attr):
@@ -143,6 +186,9 @@ class Table:
         Get the number of rows in the table, optionally restricted to
         those that meet the given criteria.
         """
+        if where is None and not kwargs:
+            # nothing to filter or join, so skip building a Select
+            return self._db.execute(self._count_sql).fetchone()[0]
         return self.select(
             count(),
             where,
@@ -155,6 +201,8 @@ class Table:
         Make and execute a Select statement from
         this table, and return the first result.
         """
+        # only one row is read, so let SQLite stop (or sort) early
+        kwargs.setdefault('limit', 1)
         return self.select(cols, where, **kwargs).execute().fetchone()
     
     
@@ -166,12 +214,37 @@ class Table:
         return self.select(cols, where, **kwargs).execute().fetchall()
     
     
-    def insert(self, row: dict = {}, **kwargs) -> int:
+    def insert(self, row: dict = None, or_: str = None, **kwargs) -> int:
         """
         Make and execute an Insert statement into this table, and return
         the index of the of the new row.
+        
+        If every value is a plain number, string, bytes, or None, the
+        Insert statement is skipped and the values are bound to a
+        compiled 'INSERT ... VALUES (?, ...)' template instead, so that
+        SQLite can reuse the prepared statement for each row.
         """
-        return Insert(table = self, row = row, **kwargs).execute().lastrowid
+        values = {**row, **kwargs} if row else kwargs
+        if self._bindable(values):
+            return self._db.execute(
+                ''.join(InsertMany._compile(self._name, tuple(values), or_)),
+                tuple(values.values()),
+            ).lastrowid
+        return Insert(
+            table = self, row = row, or_ = or_, **kwargs
+        ).execute().lastrowid
+    
+    
+    def _bindable(self, values: dict) -> bool:
+        "Whether every key is a column and every value can be bound as is"
+        for k, v in values.items():
+            if (
+                k not in self._columns
+                or v.__class__ not in _BINDABLE_TYPES
+                or v.__class__ is str and v in _LITERALS
+            ):
+                return False
+        return bool(values)
     
     
     def insertmany(
@@ -183,19 +256,63 @@ class Table:
     ) -> int:
         """
         Make and execute an InsertMany statement, and return the number
-        of rows added.
+        of rows added. The rows are inserted inside a single transaction
+        (see Database.transaction), so either all of them are added or
+        none are, and the disk is synced once rather than once per row.
+        If the database doesn't autocommit, the rows are left uncommitted
+        like any other change, until Database.commit() is called.
         """
-        return InsertMany(
+        statement = InsertMany(
             table = self,
             cols = cols,
             rows = rows,
             or_ = or_,
             **kwargs
-        ).execute().rowcount
+        )
+        connection = self._db.connection
+        if not self._db._autocommit and not connection.in_transaction:
+            # transaction() then only adds a savepoint, which is released
+            # into this transaction instead of being committed
+            connection.execute('BEGIN')
+        with self.transaction():
+            statement.execute()
+        return statement.rowcount
+    
+    
+    def insert_many(self, rows: list[dict], or_: str = None, **kwargs) -> int:
+        """
+        Like insertmany(), but each row is a dict mapping column names
+        to values, and the columns are taken from the keys of the first
+        row. Rows are converted to tuples lazily, so a generator of
+        dicts is never fully loaded into memory. Returns the number of
+        rows added.
+        """
+        rows = iter(rows)
+        first_row = next(rows, None)
+        if first_row is None:
+            return 0
+        cols = tuple(first_row.keys())
+        return self.insertmany(
+            cols = cols,
+            rows = (
+                tuple(row[col] for col in cols)
+                for row in chain((first_row,), rows)
+            ),
+            or_ = or_,
+            **kwargs
+        )
+    
+    
+    def transaction(self):
+        """
+        Context manager that groups every statement in its body into one
+        transaction. Shorthand for Database.transaction().
+        """
+        return self._db.transaction()
     
     
     def update(self,
-        updates: dict[Column, Expression] = {},
+        updates: dict[Column, Expression] = None,
         where: Expression = None,
         **kwargs,
     ) -> int:
@@ -242,9 +359,24 @@ class Table:
     
     @cached_property
     def _info(self):
-        return self._db.connection.execute(
-            f"PRAGMA TABLE_INFO({self._name})"
-        ).fetchall()
+        info = self._db._infos.get(self._name)
+        if info is None:
+            info = self._db.connection.execute(
+                f"PRAGMA TABLE_INFO({self._name})"
+            ).fetchall()
+        return info
+    
+    
+    @cached_property
+    def _count_sql(self):
+        "SQL to count every row in this table"
+        return f'SELECT COUNT(*) FROM {self._name}'
+    
+    
+    @cached_property
+    def _info_by_name(self):
+        "Rows from _info, keyed by column name"
+        return {row[1]: row for row in self._info}
     
     
     @cached_property
@@ -254,6 +386,9 @@ class Table:
         Otherwise, generate a schema from the list of columns, etc.
         """
         if self._db: # load schema from DB
+            schema = self._db._schemas.get(self._name)
+            if schema:
+                return schema
             cur = self._db.connection.execute(
                 "SELECT sql FROM sqlite_schema WHERE tbl_name = ?",
                 (self._name,)
@@ -261,15 +396,22 @@ class Table:
             return cur.fetchone()[0]
         
         # if no DB, derive schema from values provided in __init__
-        cols = []
-        foreign_keys = []
+        clauses = ", ".join(self._iter_clauses())
+        return f'CREATE TABLE {self._name} ({clauses})'
+    
+    
+    def _iter_clauses(self):
+        """
+        Yield each column definition, foreign key, and primary key clause
+        of a CREATE TABLE statement for this table.
+        """
         for col in self._columns.values():
             if col._constraints:
-                cols.append(f'{col._name} {col._constraints}')
+                yield f'{col._name} {col._constraints}'
             else:
-                cols.append(col._name)
+                yield col._name
         
-        for key, value in self._foreign_keys.items():
+        for key, value in self._foreign_key_refs.items():
             if type(value) is str:
                 if '.' in value: # e.g. users.id
                     parts = value.split('.')
@@ -286,37 +428,125 @@ class Table:
                     f'{value._table._name}'
                     f'({value._name})'
                 )
-            foreign_keys.append(
-                f'FOREIGN KEY ({key}) REFERENCES {col_ref}'
-            )
-        
-        clauses = cols + foreign_keys
+            yield f'FOREIGN KEY ({key}) REFERENCES {col_ref}'
         
         if self._primary_key:
-            primary_key_cols = [str(col) for col in self._primary_key]
-            clauses.append(f'PRIMARY KEY ({", ".join(primary_key_cols)})')
-        
-        return f'CREATE TABLE {self._name} ({", ".join(clauses)})'
+            primary_key_cols = ", ".join(map(str, self._primary_key))
+            yield f'PRIMARY KEY ({primary_key_cols})'
     
     
-    @cached_property
-    def _foreign_keys(self):
-        results = {}
-        matches = finditer(
-            (
-                fr'FOREIGN KEY \((.+?)\) '
-                r'REFERENCES ([^\s]+?) ?\((.+?)\)'
-            ),
-            self._schema
-        )
-        for match in matches:
-            table = match.group(2)
-            column = match.group(3)
-            results[self[match.group(1)]] = self._db[table][column]
-        return results
+    @property
+    def _foreign_keys(self) -> _ForeignKeyView:
+        """
+        Mapping of each foreign key Column in this table to the Column
+        it references. Referenced tables are only looked up when a key
+        is actually used.
+        """
+        # stored in a plain attribute and reset by _clear_cache(), since
+        # this is read for every table whenever joins are worked out
+        view = self._foreign_keys_cache
+        if view is None:
+            if self._db:
+                refs = {
+                    match.group(1): f'{match.group(2)}({match.group(3)})'
+                    for match in _FK_RE.finditer(self._schema)
+                }
+            else:
+                refs = self._foreign_key_refs
+            view = self._foreign_keys_cache = _ForeignKeyView(self, refs)
+        return view
     
     
     def _clear_cache(self):
-        for prop in ['_foreign_keys', '_schema', '_info']:
+        for prop in ['_schema', '_info', '_info_by_name', '_count_sql']:
             if prop in self.__dict__:
                 self.__dict__.pop(prop)
+        self._foreign_keys_cache = None
+        if self._db:
+            self._db._forget_schema(self._name)
+
+
+def _split_clauses(body: str):
+    """
+    Yield each comma-separated clause of the body of a CREATE TABLE
+    statement in one pass, ignoring commas inside parentheses, as in
+    'PRIMARY KEY (a, b)' or 'DECIMAL(10, 2)'.
+    """
+    depth = start = 0
+    for i, char in enumerate(body):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and not depth:
+            yield body[start:i].strip()
+            start = i + 1
+    yield body[start:].strip()
+
+
+class _ForeignKeyView(Mapping):
+    """
+    Read-only mapping of a table's foreign key Columns to the Columns
+    they reference. References are kept as given, e.g. 'users(id)',
+    and only resolved to Columns on lookup. Keys may be Columns or
+    column names.
+    """
+    __slots__ = ('_table', '_refs', '_resolved', '_conditions')
+    
+    def __init__(self, table: Table, refs: dict):
+        self._table = table
+        self._refs = refs
+        self._resolved = {}
+        self._conditions = {}
+    
+    def __getitem__(self, key) -> Column:
+        name = self._key_name(key)
+        column = self._resolved.get(name)
+        if column is None:
+            if name not in self._refs:
+                raise KeyError(key)
+            column = self._refs[name]
+            if type(column) is str:
+                column = self._table._db[column]
+            self._resolved[name] = column
+        return column
+    
+    def __contains__(self, key) -> bool:
+        return self._key_name(key) in self._refs
+    
+    def _key_name(self, key) -> str:
+        """
+        Return the column name for a key, or None if the key is a Column
+        from some other table.
+        """
+        if type(key) is str:
+            return key
+        if key._table is self._table:
+            return key._name
+        return None
+    
+    def __iter__(self):
+        return (self._table[name] for name in self._refs)
+    
+    def __len__(self) -> int:
+        return len(self._refs)
+    
+    def _join_conditions(self) -> list[Expression]:
+        """
+        Return a 'key = foreign key' Expression for each reference that
+        can be resolved. References to missing tables or columns are
+        skipped rather than raising, so that one bad foreign key doesn't
+        stop other tables from being joined.
+        """
+        conditions = []
+        for name in self._refs:
+            condition = self._conditions.get(name)
+            if condition is None:
+                try:
+                    key, foreign_key = self._table[name], self[name]
+                except (KeyError, AttributeError):
+                    continue
+                condition = Expression(key, '=', foreign_key)
+                self._conditions[name] = condition
+            conditions.append(condition)
+        return conditions
@@ -14,6 +14,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/raindrum/hissdb",
     packages=setuptools.find_packages(),
+    extras_require={'regex': ['sqlite-regex']},
     classifiers=[
         'Programming Language :: Python :: 3.9',
         'Operating System :: OS Independent',
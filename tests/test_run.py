@@ -1,4 +1,8 @@
-from hissdb import Database, Table, Column, Select
+import sqlite3
+
+import pytest
+
+from hissdb import Database, Table, Column, Expression, Select, InsertMany
 from hissdb.functions import count
 
 db = jane_id = john_id = posts = users = None
@@ -193,3 +197,268 @@ def test_intersect():
     combined_search = repeat_poster & e_in_firstname
     results = combined_search.execute().fetchall()
     assert results == [(jane_id,)]
+
+def test_insert_many_dicts():
+    row_count = posts.insert_many(
+        {'user_id': john_id, 'date': 20210901 + i, 'text': f'Post {i}'}
+        for i in range(3)
+    )
+    assert row_count == 3
+    assert posts.count(posts.text.startswith('Post ')) == 3
+    assert posts.delete(posts.text.startswith('Post ')) == 3
+
+def test_transaction():
+    try:
+        with db.transaction():
+            users.insert(first_name = 'Temp', last_name = 'User')
+            assert users.count(first_name = 'Temp') == 1
+            raise ValueError
+    except ValueError:
+        pass
+    assert users.count(first_name = 'Temp') == 0
+
+def test_render():
+    expr = (users.first_name == "it's :2") & (users.age > 2.5)
+    assert expr.render() == (
+        "users.first_name = 'it''s :2' AND users.age > 2.5"
+    )
+
+def test_iter_column():
+    ages = users.age.iter(users.age > 0)
+    assert next(ages) == 25
+    assert list(ages) == [36, 37]
+
+def test_invert_or():
+    exclamation = posts.text.endswith('!')
+    question = posts.text.endswith('?')
+    neither = posts.text.fetchall(~(exclamation | question))
+    assert neither == ['The weather is nice today.']
+
+def test_insertmany_unrolled():
+    row_count = posts.insertmany(
+        cols = ('user_id', 'date', 'text'),
+        rows = ((john_id, 20210901, f'Unrolled {i}') for i in range(5)),
+        unroll = 2,
+    )
+    assert row_count == 5
+    assert posts.delete(posts.text.startswith('Unrolled ')) == 5
+
+def test_group_by_multiple():
+    post_counts = posts.fetchall(
+        cols = (posts.user_id, posts.date, count(posts.text)),
+        group_by = (posts.user_id, posts.date),
+        order_by = posts.date,
+        limit = 2,
+    )
+    assert post_counts == [(jane_id, 20210814, 1), (jane_id, 20210816, 1)]
+
+def test_statement_str_cache():
+    statement = users.select(users.first_name, limit = 1)
+    assert str(statement) is str(statement)
+    statement.limit = 2
+    assert 'LIMIT 2' in str(statement)
+
+def test_insertmany_streams_rows():
+    statement = InsertMany(
+        table = posts,
+        cols = ('user_id', 'date', 'text'),
+        rows = ((john_id, 20210902, f'Streamed {i}') for i in range(3)),
+    )
+    assert statement.placeholders == {}
+    repr(statement)
+    assert statement.execute().rowcount == 3
+    assert posts.delete(posts.text.startswith('Streamed ')) == 3
+
+def test_insert_plain_values():
+    next_id = users.id.fetchone(order_by = users.id.desc) + 1
+    
+    # a literal word like 'NULL' still goes through Insert
+    row_id = users.insert(first_name = 'Plain', last_name = 'NULL')
+    assert row_id == next_id
+    assert users.fetchone(users.last_name, users.id == row_id) == (None,)
+    
+    row_id = users.insert(first_name = 'Plain', last_name = 'Row', age = 5)
+    assert row_id == next_id + 1
+    assert users.fetchone(
+        (users.first_name, users.last_name, users.age),
+        users.id == row_id,
+    ) == ('Plain', 'Row', 5)
+    assert users.delete(users.first_name == 'Plain') == 2
+
+def test_insertmany_atomic():
+    rows = [(john_id, 20210903, 'Atomic'), (None, 20210903, 'Atomic')]
+    with pytest.raises(sqlite3.IntegrityError):
+        posts.insertmany(cols = ('user_id', 'date', 'text'), rows = rows)
+    assert posts.count(text = 'Atomic') == 0
+
+def test_parse_schema():
+    name, columns, foreign_keys, primary_key = Table._parse_schema(
+        'CREATE TABLE prices ("item" TEXT, price DECIMAL(10, 2),'
+        ' FOREIGN KEY (item) REFERENCES items(name),'
+        ' PRIMARY KEY (item, price))'
+    )
+    assert name == 'prices'
+    assert columns == {'item': 'TEXT', 'price': 'DECIMAL(10, 2)'}
+    assert foreign_keys == {'item': 'items(name)'}
+    assert primary_key == ('item', 'price')
+
+def test_matches():
+    assert users.first_name.fetchall(users.first_name.matches('^J.n')) == [
+        'Jane'
+    ]
+    assert 'Jane' not in users.first_name.fetchall(
+        ~users.first_name.matches('^J.n')
+    )
+
+def test_reopen_file(tmp_path):
+    path = tmp_path / 'reopen.db'
+    file_db = Database(path)
+    file_db.create_table('items', id = 'INTEGER PRIMARY KEY', label = 'TEXT')
+    file_db.execute('CREATE INDEX items_label ON items (label)')
+    file_db.items.insert(label = 'x')
+    file_db.execute('ANALYZE')
+    file_db.disconnect()
+    
+    file_db = Database(path)
+    assert 'items' in file_db and 'items_label' not in file_db
+    assert 'sqlite_stat1' not in file_db
+    assert file_db.items.label.type == 'TEXT'
+    file_db.disconnect()
+
+def test_foreign_key_view():
+    assert posts.user_id._foreign_key is users.id
+    assert users.first_name._foreign_key is None
+    (key, foreign_key), = posts._foreign_keys.items()
+    assert key is posts.user_id and foreign_key is users.id
+    
+    # a column with the same name in another table is a different key
+    other = db.create_table('others', user_id = 'INTEGER')
+    assert other.user_id not in posts._foreign_keys
+    with pytest.raises(KeyError):
+        posts._foreign_keys[other.user_id]
+    db.drop_table('others')
+
+def test_parse_schema_without_spaces():
+    name, columns, _, primary_key = Table._parse_schema(
+        'CREATE TABLE tags(name TEXT, n, PRIMARY KEY (name)) WITHOUT ROWID'
+    )
+    assert name == 'tags'
+    assert columns == {'name': 'TEXT', 'n': None}
+    assert primary_key == ('name',)
+
+def test_concat_varchar():
+    notes = db.create_table('notes', title = 'VARCHAR(20)', body = 'CLOB')
+    notes.insert(title = 'Hello', body = 'world')
+    joined = notes.title + ', ' + notes.body
+    assert '||' in str(joined)
+    assert notes.fetchone(joined) == ('Hello, world',)
+    db.drop_table('notes')
+
+def test_bulk_setup():
+    row_count = db.bulk_setup({
+        users: [{'first_name': 'Bulk', 'last_name': 'User'}],
+        'posts': (
+            {'user_id': john_id, 'date': 20210904, 'text': f'Bulk {i}'}
+            for i in range(2)
+        ),
+    })
+    assert row_count == 3
+    assert users.delete(users.first_name == 'Bulk') == 1
+    assert posts.delete(posts.text.startswith('Bulk ')) == 2
+
+def test_missing_attributes():
+    assert not hasattr(users, '__deepcopy__')
+    assert not hasattr(users.age, 'no_such_attribute')
+    assert users.age.type == 'INTEGER'
+
+def test_count_all():
+    assert users.count() == len(users.id.fetchall())
+    assert posts.count() == posts.count(posts.date > 0)
+
+def test_implicit_join_dangling_foreign_key():
+    db.create_table(
+        'orphans',
+        ref = 'INTEGER',
+        foreign_keys = {'ref': 'gone(id)'},
+    )
+    texts = posts.text.fetchall(
+        users.first_name == 'John',
+        order_by = posts.date,
+    )
+    assert texts[0] == "I'm John Doe and this is my first post!"
+    db.drop_table('orphans')
+
+def test_reopen_recreated_file(tmp_path):
+    path = tmp_path / 'recreated.db'
+    file_db = Database(path, pragmas = {})
+    file_db.create_table('alpha', a = 'TEXT')
+    file_db.disconnect()
+    Database(path).disconnect()
+    path.unlink()
+    
+    # a new file at the same path. parsing is cached by the text of each
+    # CREATE TABLE statement, so the cache can't disagree with the file
+    file_db = Database(path, pragmas = {})
+    file_db.create_table('beta', b = 'TEXT')
+    file_db.disconnect()
+    file_db = Database(path)
+    assert list(file_db._tables) == ['beta']
+    file_db.disconnect()
+
+def test_nullable_function_argument():
+    from hissdb.functions import coalesce, ifnull
+    assert str(coalesce(users.age, None)) == 'COALESCE(users.age, NULL)'
+    assert str(ifnull(users.age, None)) == 'IFNULL(users.age, NULL)'
+    assert str(Expression(users.age, 'NOT', 'NULL')) == (
+        'users.age NOT NULL'
+    )
+    assert users.age.fetchall(users.first_name == 'Jane') == [None]
+    assert users.fetchone(
+        coalesce(users.age, None), users.first_name == 'Jane'
+    ) == (None,)
+
+
+def test_build_skips_invalidation(monkeypatch):
+    calls = []
+    monkeypatch.setattr(Select, '_invalidate', lambda self: calls.append(1))
+    statement = users.select(
+        users.first_name,
+        where = (users.age > 3) & (users.first_name == 'x'),
+    )
+    statement.limit = 1
+    assert not calls
+    str(statement)
+    statement.limit = 2
+    assert calls
+
+
+def test_insertmany_without_autocommit(tmp_path):
+    manual_db = Database(tmp_path / 'manual.db', autocommit = False)
+    items = manual_db.create_table('items', label = 'TEXT')
+    assert items.insertmany(cols = ('label',), rows = [('a',), ('b',)]) == 2
+    assert manual_db.connection.in_transaction
+    manual_db.rollback()
+    assert items.count() == 0
+    manual_db.disconnect()
+
+
+def test_unary_function_arity():
+    from hissdb.functions import length, coalesce
+    assert str(length(users.first_name)) == 'LENGTH(users.first_name)'
+    with pytest.raises(TypeError):
+        length(users.first_name, users.last_name)
+    assert length.__name__ == 'length' and coalesce.__name__ == 'coalesce'
+
+
+def test_underscore_column():
+    users._nickname = Column(constraints = 'TEXT')
+    assert '_nickname' not in users.__dict__
+    assert users._nickname.type == 'TEXT'
+    assert users['_nickname'] is users._nickname
+    del users._nickname
+    assert not hasattr(users, '_nickname')
+
+
+def test_insertmany_without_columns():
+    with pytest.raises(ValueError):
+        posts.insertmany(cols = (), rows = [()], unroll = 10)